@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for the RS10X API.
+
+Usage:
+    gunicorn -c gunicorn.conf.py server:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Job state (analysis_jobs, ANALYSIS_POOL, report downloads) lives in the worker
+# process, so one worker by default - a status poll landing on another worker
+# would 404. Scale with threads (RS10X_THREADS) until that state is shared.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('RS10X_THREADS', 16))
+timeout = 600
+
+# Import the app (and agent modules) once in the master and share it across workers
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Background threads don't survive fork - restart the job sweeper per worker."""
+    import server as app_server
+    app_server.start_job_sweeper()
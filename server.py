@@ -9,24 +9,60 @@ Environment Variables (set in Railway):
 - SUPABASE_URL: Your Supabase project URL
 - SUPABASE_KEY: Your Supabase anon/service key
 - PORT: Automatically set by Railway
+- RS10X_JOBS_DIR: Where job uploads/reports are written (default /var/lib/rs10x/jobs,
+  or rs10x-jobs under the system temp dir if that can't be created)
+- RS10X_MAX_CONCURRENT_JOBS: Analyses allowed to run at once (default 2)
+- RS10X_THREADS: Request threads in the gunicorn worker (default 16). Job state is
+  per process, so keep WEB_CONCURRENCY at its default of 1.
 """
 
 import os
 import sys
 import json
+import hashlib
 import shutil
 import zipfile
 import tempfile
 import subprocess
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from flask import Flask, request, jsonify, send_file, Response
+from datetime import datetime, timedelta
+from flask import Flask, Request, request, jsonify, send_file, Response
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from supabase import create_client, Client
 
+from summary_writer import generate_summary, label_reports, format_final_report
+
+# orjson is much faster than stdlib json for large report payloads
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# xxhash makes hashing uploads for dedupe essentially free
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if HAS_ORJSON:
+    app.json = ORJSONProvider(app)
 CORS(app, origins="*")
 
 # Supabase setup
@@ -45,6 +81,52 @@ analysis_jobs = {}
 # Path to agents directory
 AGENTS_DIR = Path(__file__).parent
 
+# In-memory jobs (and their temp files) older than this are swept
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', 3600))
+JOB_SWEEP_INTERVAL = 300
+
+# Job working dirs live on a real disk, not /tmp (often tmpfs, i.e. RAM)
+JOBS_DIR = Path(os.environ.get('RS10X_JOBS_DIR', '/var/lib/rs10x/jobs'))
+try:
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    if not os.access(JOBS_DIR, os.W_OK):
+        raise PermissionError(f"{JOBS_DIR} is not writable")
+except OSError as e:
+    # e.g. not running as root - keep working out of the system temp dir
+    print(f"⚠ Cannot use jobs dir {JOBS_DIR} ({e}) - falling back to temp dir")
+    JOBS_DIR = Path(tempfile.gettempdir()) / 'rs10x-jobs'
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Every dir the server creates under JOBS_DIR gets this prefix, so the sweeper
+# only ever deletes its own leftovers
+JOB_DIR_PREFIX = 'rs10x_'
+UPLOAD_BUFFER_SIZE = 1 << 20
+# Uploads bigger than this are spooled to a file under JOBS_DIR
+UPLOAD_SPOOL_SIZE = 500 * 1024
+
+
+class JobsDirRequest(Request):
+    """Request that spools large file uploads under JOBS_DIR.
+    
+    Werkzeug's default spools them into the system temp dir, so a big zip
+    would still sit on /tmp (tmpfs) while it is being extracted.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(
+            max_size=UPLOAD_SPOOL_SIZE,
+            mode='rb+',
+            prefix=JOB_DIR_PREFIX,
+            dir=str(JOBS_DIR),
+        )
+
+
+app.request_class = JobsDirRequest
+
+# Each running analysis fans out to every agent - cap how many run at once.
+# The pool is per process, which is why gunicorn runs a single worker.
+ANALYSIS_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get('RS10X_MAX_CONCURRENT_JOBS', 2)))
+
 
 def get_python_cmd():
     """Get the right Python command for this system."""
@@ -59,6 +141,41 @@ def get_python_cmd():
 
 PYTHON_CMD = get_python_cmd()
 
+AGENT_TIMEOUT = 300
+
+
+def run_agent(cmd: list, timeout: int = AGENT_TIMEOUT):
+    """Run an agent script, terminating (then killing) it if it overruns timeout.
+    
+    Returns (stdout, stderr, timed_out).
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
+        encoding='utf-8',
+        errors='replace'
+    )
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+        return stdout, stderr, False
+    except subprocess.TimeoutExpired:
+        # Ask nicely first, then make sure the pipes are drained before returning
+        proc.terminate()
+        try:
+            stdout, stderr = proc.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            stdout, stderr = proc.communicate()
+        return stdout, stderr, True
+
+
+def job_is_queued(job_id: str) -> bool:
+    """True while a job in this worker is still waiting for a free ANALYSIS_POOL slot."""
+    future = analysis_jobs.get(job_id, {}).get('future')
+    return bool(future and not future.running() and not future.done())
+
 
 # =============================================================================
 # SUPABASE JOB PERSISTENCE
@@ -160,11 +277,103 @@ def delete_job_from_db(job_id: str):
         print(f"Error deleting job: {e}")
 
 
+# =============================================================================
+# JOB CLEANUP
+# =============================================================================
+
+def sweep_expired_jobs():
+    """Drop finished jobs older than JOB_TTL_SECONDS and delete their temp files.
+    
+    Also deletes job dirs nobody has touched for JOB_TTL_SECONDS - leftovers from a
+    crash or restart that no worker's analysis_jobs knows about any more.
+    """
+    cutoff = datetime.now() - timedelta(seconds=JOB_TTL_SECONDS)
+    for job_id, job in list(analysis_jobs.items()):
+        # Never pull files out from under a running analysis
+        if not job.get('completed'):
+            continue
+        if datetime.fromisoformat(job['created_at']) < cutoff:
+            shutil.rmtree(job['temp_dir'], ignore_errors=True)
+            analysis_jobs.pop(job_id, None)
+    
+    # Refresh the jobs this worker still holds (queued, running or not yet expired)
+    # so other workers' sweeps never mistake them for orphans
+    for job in list(analysis_jobs.values()):
+        try:
+            os.utime(job['temp_dir'])
+        except OSError:
+            pass
+    
+    cutoff_ts = cutoff.timestamp()
+    try:
+        with os.scandir(JOBS_DIR) as it:
+            for entry in it:
+                if (entry.name.startswith(JOB_DIR_PREFIX)
+                        and entry.is_dir(follow_symlinks=False)
+                        and entry.stat(follow_symlinks=False).st_mtime < cutoff_ts):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+    except OSError as e:
+        print(f"Error sweeping {JOBS_DIR}: {e}")
+
+
+def start_job_sweeper():
+    """Run sweep_expired_jobs every JOB_SWEEP_INTERVAL seconds in the background."""
+    def tick():
+        try:
+            sweep_expired_jobs()
+        except Exception as e:
+            print(f"Error sweeping jobs: {e}")
+        start_job_sweeper()
+    
+    timer = threading.Timer(JOB_SWEEP_INTERVAL, tick)
+    timer.daemon = True
+    timer.start()
+
+
+start_job_sweeper()
+
+
+# =============================================================================
+# UPLOAD DEDUPE
+# =============================================================================
+
+def hash_upload(stream) -> str:
+    """Hash an upload stream in 1MB chunks, then rewind it."""
+    hasher = xxhash.xxh3_64() if HAS_XXHASH else hashlib.blake2b(digest_size=8)
+    for chunk in iter(lambda: stream.read(UPLOAD_BUFFER_SIZE), b''):
+        hasher.update(chunk)
+    stream.seek(0)
+    return hasher.hexdigest()
+
+
+def find_cached_job(upload_hash: str):
+    """Find a completed in-memory job for an identical upload whose agents all succeeded."""
+    for job in list(analysis_jobs.values()):
+        # A job with agent errors/timeouts has partial reports - cloning them would hide that
+        if (job.get('upload_hash') == upload_hash and job['completed']
+                and not job.get('error') and not job['errors']
+                and os.path.isdir(job['output_dir'])):
+            return job
+    return None
+
+
+def clone_reports(source_dir: str, dest_dir: str):
+    """Hardlink agent reports into a new job (the executive brief is per-question)."""
+    for entry in os.scandir(source_dir):
+        if not entry.is_file() or entry.name == 'executive_brief.md':
+            continue
+        dest = os.path.join(dest_dir, entry.name)
+        try:
+            os.link(entry.path, dest)
+        except OSError:
+            shutil.copy2(entry.path, dest)
+
+
 # =============================================================================
 # ANALYSIS LOGIC
 # =============================================================================
 
-def run_analysis(job_id: str, codebase_path: str, question: str):
+def run_analysis(job_id: str, codebase_path: str, question: str, reuse_reports: bool = False):
     """Run all agents and update progress."""
     job = analysis_jobs[job_id]
     
@@ -181,7 +390,9 @@ def run_analysis(job_id: str, codebase_path: str, question: str):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     try:
-        for agent_script, report_file, status_msg, progress in agents:
+        # Reports cloned from an identical upload don't need the agents re-run
+        pending_agents = [] if reuse_reports else agents
+        for agent_script, report_file, status_msg, progress in pending_agents:
             job['status'] = status_msg
             job['progress'] = progress - 10
             save_job_to_db(job_id, status_msg, progress - 10, status_msg)
@@ -196,21 +407,27 @@ def run_analysis(job_id: str, codebase_path: str, question: str):
             if script_path.exists():
                 output_file = str(output_dir / report_file)
                 try:
-                    result = subprocess.run(
-                        [PYTHON_CMD, str(script_path), codebase_path, '--output', output_file],
-                        capture_output=True,
-                        timeout=300,
-                        env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
-                        encoding='utf-8',
-                        errors='replace'
+                    _, stderr, timed_out = run_agent(
+                        [PYTHON_CMD, str(script_path), codebase_path, '--output', output_file]
                     )
-                    job['agents_completed'].append(agent_script.replace('.py', '').replace('_', ' ').title())
+                    if timed_out:
+                        job['errors'].append(
+                            f"{agent_script}: timed out after {AGENT_TIMEOUT}s\n{(stderr or '')[-1000:]}"
+                        )
+                    else:
+                        job['agents_completed'].append(agent_script.replace('.py', '').replace('_', ' ').title())
                 except Exception as e:
                     job['errors'].append(f"{agent_script}: {str(e)}")
             
             job['progress'] = progress
             save_job_to_db(job_id, status_msg, progress, status_msg)
-            time.sleep(0.3)
+        
+        # Collect all report contents - read once, reused by the summary writer
+        reports = {}
+        for _, report_file, _, _ in agents:
+            report_path = output_dir / report_file
+            if report_path.exists():
+                reports[report_file] = report_path.read_text(encoding='utf-8', errors='ignore')
         
         # Run summary writer if question provided
         if question:
@@ -218,39 +435,20 @@ def run_analysis(job_id: str, codebase_path: str, question: str):
             job['progress'] = 95
             save_job_to_db(job_id, 'Generating executive brief', 95, 'Generating executive brief')
             
-            summary_script = AGENTS_DIR / 'summary_writer.py'
-            if summary_script.exists():
-                try:
-                    result = subprocess.run(
-                        [PYTHON_CMD, str(summary_script), str(output_dir), 
-                         '--question', question, 
-                         '--output', str(output_dir / 'executive_brief.md')],
-                        capture_output=True,
-                        timeout=120,
-                        env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
-                        encoding='utf-8',
-                        errors='replace'
-                    )
-                except Exception as e:
-                    job['errors'].append(f"summary_writer: {str(e)}")
+            try:
+                summary = generate_summary(label_reports(reports), question)
+                brief = format_final_report(summary, question, str(output_dir))
+                (output_dir / 'executive_brief.md').write_text(brief, encoding='utf-8')
+                reports['executive_brief.md'] = brief
+            except Exception as e:
+                job['errors'].append(f"summary_writer: {str(e)}")
         
+        job['reports'] = reports
         job['progress'] = 100
         job['status'] = 'Analysis complete'
         job['completed'] = True
         job['completed_at'] = datetime.now().isoformat()
         
-        # Collect all report contents
-        job['reports'] = {}
-        for _, report_file, _, _ in agents:
-            report_path = output_dir / report_file
-            if report_path.exists():
-                job['reports'][report_file] = report_path.read_text(encoding='utf-8', errors='ignore')
-        
-        # Add executive brief if exists
-        brief_path = output_dir / 'executive_brief.md'
-        if brief_path.exists():
-            job['reports']['executive_brief.md'] = brief_path.read_text(encoding='utf-8', errors='ignore')
-        
         # Save to database
         save_job_to_db(job_id, 'Analysis complete', 100, 'Complete', completed=True)
         save_reports_to_db(job_id, job['reports'])
@@ -283,25 +481,25 @@ def analyze():
     job_id = f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.urandom(4).hex()}"
     
     # Create temp directories
-    temp_dir = tempfile.mkdtemp()
-    upload_path = os.path.join(temp_dir, 'upload')
+    temp_dir = tempfile.mkdtemp(prefix=JOB_DIR_PREFIX, dir=str(JOBS_DIR))
     extract_path = os.path.join(temp_dir, 'codebase')
     output_path = os.path.join(temp_dir, 'reports')
     
-    os.makedirs(upload_path, exist_ok=True)
     os.makedirs(extract_path, exist_ok=True)
     os.makedirs(output_path, exist_ok=True)
     
-    # Save uploaded file
     filename = file.filename
-    file_path = os.path.join(upload_path, filename)
-    file.save(file_path)
-    
-    # Extract if zip
     codebase_path = extract_path
-    if filename.endswith('.zip'):
+    upload_hash = hash_upload(file.stream) if filename.endswith('.zip') else None
+    cached_job = find_cached_job(upload_hash) if upload_hash else None
+    
+    if cached_job:
+        # Same codebase uploaded before - reuse its reports instead of re-extracting
+        clone_reports(cached_job['output_dir'], output_path)
+    elif filename.endswith('.zip'):
         try:
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
+            # Extract straight from the upload stream (spooled under JOBS_DIR if large)
+            with zipfile.ZipFile(file.stream, 'r') as zip_ref:
                 zip_ref.extractall(extract_path)
             
             # Check if zip contained a single folder
@@ -309,10 +507,12 @@ def analyze():
             if len(items) == 1 and os.path.isdir(os.path.join(extract_path, items[0])):
                 codebase_path = os.path.join(extract_path, items[0])
         except Exception as e:
+            shutil.rmtree(temp_dir, ignore_errors=True)
             return jsonify({'error': f'Failed to extract zip: {str(e)}'}), 400
     else:
-        # Single file - just analyze the upload directory
-        shutil.move(file_path, os.path.join(extract_path, filename))
+        # Single file - stream it straight into the codebase directory
+        with open(os.path.join(extract_path, filename), 'wb', buffering=UPLOAD_BUFFER_SIZE) as f:
+            file.save(f, buffer_size=UPLOAD_BUFFER_SIZE)
     
     # Initialize job in memory
     analysis_jobs[job_id] = {
@@ -324,19 +524,20 @@ def analyze():
         'temp_dir': temp_dir,
         'output_dir': output_path,
         'codebase_path': codebase_path,
-        'agents_completed': [],
+        'agents_completed': list(cached_job['agents_completed']) if cached_job else [],
         'errors': [],
         'reports': {},
+        'upload_hash': upload_hash,
         'created_at': datetime.now().isoformat()
     }
     
     # Create job in database
     create_job_in_db(job_id, question)
     
-    # Start analysis in background
-    thread = threading.Thread(target=run_analysis, args=(job_id, codebase_path, question))
-    thread.daemon = True
-    thread.start()
+    # Queue analysis in background
+    analysis_jobs[job_id]['future'] = ANALYSIS_POOL.submit(
+        run_analysis, job_id, codebase_path, question, cached_job is not None
+    )
     
     return jsonify({'job_id': job_id})
 
@@ -356,6 +557,7 @@ def get_status(job_id):
             'completed': db_job.get('completed', False),
             'current_step': db_job.get('current_step', 0),
             'total_steps': db_job.get('total_steps', 10),
+            'queued': job_is_queued(job_id),
             'agents_completed': [],
             'errors': []
         })
@@ -368,6 +570,7 @@ def get_status(job_id):
             'status': job['status'],
             'progress': job['progress'],
             'completed': job['completed'],
+            'queued': job_is_queued(job_id),
             'agents_completed': job['agents_completed'],
             'errors': job['errors']
         })
@@ -450,7 +653,7 @@ def download_all(job_id):
     # Fall back to database
     reports = get_reports_from_db(job_id)
     if reports:
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = tempfile.mkdtemp(prefix=JOB_DIR_PREFIX, dir=str(JOBS_DIR))
         zip_path = os.path.join(temp_dir, 'analysis_reports.zip')
         with zipfile.ZipFile(zip_path, 'w') as zipf:
             for name, content in reports.items():
@@ -481,43 +684,11 @@ def ask_followup(job_id):
     if not question:
         return jsonify({'error': 'No question provided'}), 400
     
-    # Get output directory
-    output_dir = None
-    if mem_job:
-        output_dir = Path(mem_job['output_dir'])
-    else:
-        # Create temp dir with reports from database
-        reports = get_reports_from_db(job_id)
-        temp_dir = tempfile.mkdtemp()
-        output_dir = Path(temp_dir)
-        for name, content in reports.items():
-            (output_dir / name).write_text(content)
-    
-    summary_script = AGENTS_DIR / 'summary_writer.py'
-    
-    if not summary_script.exists():
-        return jsonify({'error': 'Summary writer not available'}), 500
+    # Reports are already in memory (or the database) - no need to go back to disk
+    reports = mem_job['reports'] if mem_job else get_reports_from_db(job_id)
     
     try:
-        result = subprocess.run(
-            [PYTHON_CMD, str(summary_script), str(output_dir), '--question', question],
-            capture_output=True,
-            timeout=120,
-            env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
-            encoding='utf-8',
-            errors='replace'
-        )
-        
-        answer = result.stdout
-        
-        if 'EXECUTIVE BRIEF' in answer:
-            lines = answer.split('\n')
-            start_idx = 0
-            for i, line in enumerate(lines):
-                if '=' * 20 in line and i > 5:
-                    start_idx = i + 1
-                    break
-            answer = '\n'.join(lines[start_idx:])
+        answer = generate_summary(label_reports(reports), question)
         
         return jsonify({
             'question': question,
@@ -575,4 +746,11 @@ if __name__ == '__main__':
     print(f"Supabase: {'Connected' if supabase else 'NOT CONFIGURED'}")
     print("=" * 50)
     
-    app.run(host='0.0.0.0', port=port, debug=False)
+    # Serve through gunicorn where it can run; on Windows or without gunicorn on
+    # PATH fall back to the threaded dev server so local runs keep working
+    gunicorn = shutil.which('gunicorn') if os.name != 'nt' else None
+    if gunicorn:
+        os.execv(gunicorn, [gunicorn, '--chdir', str(AGENTS_DIR), '-c', str(AGENTS_DIR / 'gunicorn.conf.py'), 'server:app'])
+    
+    print("gunicorn not available - using the Flask dev server")
+    app.run(host='0.0.0.0', port=port, threaded=True)
@@ -35,6 +35,11 @@ else:
     HAS_ANTHROPIC = False
 
 
+# The server calls this in-process while holding a worker slot - don't let a
+# stalled request run on the SDK's 10-minute default with retries on top
+AI_TIMEOUT_SECONDS = 120
+AI_MAX_RETRIES = 1
+
 # Reports to read (in order of importance)
 REPORT_FILES = [
     ('bouncer_report.md', 'Health Check'),
@@ -64,10 +69,22 @@ def load_reports(reports_dir: Path) -> dict:
     return reports
 
 
+def label_reports(report_contents: dict) -> dict:
+    """Key already-loaded report contents (by filename) by label, like load_reports."""
+    return {
+        label: report_contents.get(filename, "[Report not found]")
+        for filename, label in REPORT_FILES
+    }
+
+
 def generate_summary_with_ai(reports: dict, question: str) -> str:
     """Use Claude to generate a prose executive summary."""
     
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    client = anthropic.Anthropic(
+        api_key=ANTHROPIC_API_KEY,
+        timeout=AI_TIMEOUT_SECONDS,
+        max_retries=AI_MAX_RETRIES,
+    )
     
     # Build context from all reports
     reports_context = ""
@@ -164,6 +181,25 @@ def generate_summary_basic(reports: dict, question: str) -> str:
     return "\n".join(lines)
 
 
+def generate_summary(reports: dict, question: str) -> str:
+    """Generate the summary with AI if available, falling back to the basic version."""
+    
+    if HAS_ANTHROPIC and ANTHROPIC_API_KEY:
+        print("[SUMMARY] Using AI to generate executive brief...")
+        try:
+            return generate_summary_with_ai(reports, question)
+        except Exception as e:
+            print(f"[ERROR] AI generation failed: {e}")
+            print("[SUMMARY] Falling back to basic summary...")
+            return generate_summary_basic(reports, question)
+    
+    if not ANTHROPIC_API_KEY:
+        print("[SUMMARY] No API key found. Generating basic summary...")
+    else:
+        print("[SUMMARY] Anthropic library not installed. Generating basic summary...")
+    return generate_summary_basic(reports, question)
+
+
 def format_final_report(summary: str, question: str, reports_dir: str) -> str:
     """Format the final report with header."""
     
@@ -255,20 +291,7 @@ def main():
     print(f"[SUMMARY] Answering: {question}")
     
     # Generate summary
-    if HAS_ANTHROPIC and ANTHROPIC_API_KEY:
-        print("[SUMMARY] Using AI to generate executive brief...")
-        try:
-            summary = generate_summary_with_ai(reports, question)
-        except Exception as e:
-            print(f"[ERROR] AI generation failed: {e}")
-            print("[SUMMARY] Falling back to basic summary...")
-            summary = generate_summary_basic(reports, question)
-    else:
-        if not ANTHROPIC_API_KEY:
-            print("[SUMMARY] No API key found. Generating basic summary...")
-        else:
-            print("[SUMMARY] Anthropic library not installed. Generating basic summary...")
-        summary = generate_summary_basic(reports, question)
+    summary = generate_summary(reports, question)
     
     # Format final report
     final_report = format_final_report(summary, question, str(reports_dir))
@@ -18,29 +18,45 @@ Outputs:
 Usage:
     python translator.py /path/to/codebase
     python translator.py /path/to/codebase --output glossary.md
+
+Runtime:
+    This agent is pure-Python regex/string work, which PyPy's JIT handles
+    much faster than CPython. Prefer it for large codebases:
+    pypy3 translator.py /path/to/codebase --output glossary.md
 """
 
 import os
 import sys
 import re
+import gc
+import io
 import json
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+
+# Aho-Corasick finds every FIELD_TYPE_MEANINGS key in a field name in one pass
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
-# Folders where models/entities typically live
-MODEL_FOLDERS = [
+# Folders where models/entities typically live (scan order matters for duplicates)
+MODEL_FOLDERS = (
     'models', 'model', 'entities', 'entity', 'schemas', 'schema',
     'types', 'interfaces', 'domain', 'domains',
     'src/models', 'src/entities', 'src/types', 'src/domain',
     'app/models', 'app/entities', 'lib/models',
     'server/models', 'api/models', 'backend/models',
     'prisma', 'db', 'database',
-]
+)
 
 # Common field types and what they mean in business terms
 FIELD_TYPE_MEANINGS = {
@@ -70,11 +86,232 @@ FIELD_TYPE_MEANINGS = {
     'country': 'Country',
 }
 
+# Substring matcher over FIELD_TYPE_MEANINGS keys; values are (dict order, meaning)
+# so the first key in dict order still wins when several match
+if HAS_AHOCORASICK:
+    _MEANINGS_AC = ahocorasick.Automaton()
+    for _index, (_key, _meaning) in enumerate(FIELD_TYPE_MEANINGS.items()):
+        if not _MEANINGS_AC.exists(_key.lower()):
+            _MEANINGS_AC.add_word(_key.lower(), (_index, _meaning))
+    _MEANINGS_AC.make_automaton()
+
+IS_PYPY = '__pypy__' in sys.builtin_module_names
+
+# One extracted field - much lighter than a dict when there are thousands
+Field = namedtuple('Field', 'name type meaning')
+
+# Extensions scanned in model folders
+_EXT_TUPLE = ('.ts', '.js', '.py', '.prisma')
+
+# Tests, specs and config files live next to models but rarely declare any
+_NON_MODEL_SUFFIXES = ('.test.ts', '.spec.ts', '.test.js', '.spec.js', '.config.js', '.config.ts')
+_NON_MODEL_NAMES = frozenset({'__init__.py'})
+
+# Keywords a file must contain to declare a model, by extension
+_TS_MARKERS = (b'interface', b'type', b'class')
+_MODEL_MARKERS = {
+    '.ts': _TS_MARKERS, '.tsx': _TS_MARKERS, '.js': _TS_MARKERS, '.jsx': _TS_MARKERS,
+    '.py': (b'class',),
+    '.prisma': (b'model',),
+}
+
+# Files bigger than this are almost always minified or generated
+MAX_MODEL_FILE_BYTES = 2 * 1024 * 1024
+
+# Entity names that probably mean the same thing
+SIMILAR_GROUPS = [
+    ['User', 'Users', 'Account', 'Accounts', 'Member', 'Members'],
+    ['Customer', 'Customers', 'Client', 'Clients'],
+    ['Order', 'Orders', 'Purchase', 'Purchases'],
+    ['Product', 'Products', 'Item', 'Items'],
+]
+_ALIAS_TO_GROUP = {name: i for i, group in enumerate(SIMILAR_GROUPS) for name in group}
+
 # Folders to skip
-SKIP_FOLDERS = {
+SKIP_FOLDERS = frozenset({
     'node_modules', '.git', '__pycache__', '.next', 'dist', 'build',
     'coverage', 'vendor', 'venv', '.venv', 'env', '.env',
-}
+})
+
+
+# ============================================================================
+# PATTERNS (compiled once at import - these run on every file and class body)
+# ============================================================================
+
+_TS_HEADER_RE = re.compile(r'\b(?P<kind>interface|type|class)\s+(?P<name>\w+)')
+# What may sit between the name and `{`: generics, extends, implements (and `=` for types)
+_TS_GENERICS = r'(?:<[\w\s,.<>=]*>)?'
+_TS_TYPE_TAIL_RE = re.compile(r'\s*' + _TS_GENERICS + r'\s*=\s*')
+_TS_CLASS_TAIL_RE = re.compile(
+    r'\s*' + _TS_GENERICS +
+    r'(?:\s*extends\s+[\w.]+' + _TS_GENERICS + r'(?:\s*,\s*[\w.]+' + _TS_GENERICS + r')*)?'
+    r'(?:\s*implements\s+[\w.]+' + _TS_GENERICS + r'(?:\s*,\s*[\w.]+' + _TS_GENERICS + r')*)?\s*'
+)
+_TS_SPLIT_RE = re.compile(r'[{}()\[\];,\n]')
+_TS_MEMBER_RE = re.compile(
+    r'\s*(?:@[\w.]+(?:\((?:[^()]|\([^()]*\))*\))?\s*)*'
+    r'(?:(?:public|private|protected|readonly|static|declare|abstract|override)\s+)*'
+    r'(\w+)\s*[?!]?\s*:\s*(.+)',
+    re.DOTALL,
+)
+
+_PY_CLASS_HEAD_RE = re.compile(r'^([ \t]*)class[ \t]+(\w+)[ \t]*\(([^)]*)\)[ \t]*:[ \t]*\r?$', re.MULTILINE)
+_PY_FIELD_RES = (
+    re.compile(r'(\w+)\s*[=:]\s*(?:Column|Field|models\.\w+)\s*\('),
+    re.compile(r'(\w+)\s*:\s*(\w+(?:\[[\w,\s]+\])?)\s*(?:=|$)'),
+)
+
+_PRISMA_MODEL_RE = re.compile(r'model\s+(\w+)\s*\{([^}]+)\}')
+_PRISMA_FIELD_RE = re.compile(r'^[ \t]*(\w+)[ \t]+(\w+(?:\[\])?\??)', re.MULTILINE)
+
+
+def _scan_ts_blocks(content):
+    """Yield (kind, name, body) for each TypeScript interface/type/class block.
+    
+    One left-to-right pass: a single combined pattern finds the next header and
+    bodies are matched by brace depth, so nested object types stay inside their parent.
+    """
+    
+    pos = 0
+    
+    while True:
+        header_match = _TS_HEADER_RE.search(content, pos)
+        if not header_match:
+            return
+        
+        kind = header_match.group('kind')
+        name_end = pos = header_match.end()
+        
+        open_brace = content.find('{', name_end)
+        if open_brace == -1:
+            return
+        
+        # `type X = {`, or `interface/class X <generics> extends/implements ... {`;
+        # anything else (say `class` inside a comment) resumes the scan at name_end
+        tail_re = _TS_TYPE_TAIL_RE if kind == 'type' else _TS_CLASS_TAIL_RE
+        if not tail_re.fullmatch(content, name_end, open_brace):
+            continue
+        
+        depth = 1
+        i = open_brace + 1
+        while depth:
+            next_open = content.find('{', i)
+            next_close = content.find('}', i)
+            if next_close == -1:
+                return
+            if next_open != -1 and next_open < next_close:
+                depth += 1
+                i = next_open + 1
+            else:
+                depth -= 1
+                i = next_close + 1
+        
+        yield kind, header_match.group('name'), content[open_brace + 1:i - 1]
+        pos = i
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_field_meaning(field_name, field_type):
+    """Get the business meaning of a field (cached - id/created_at/... repeat a lot)."""
+    
+    lower_name = field_name.lower()
+    
+    if lower_name in FIELD_TYPE_MEANINGS:
+        return FIELD_TYPE_MEANINGS[lower_name]
+    
+    if HAS_AHOCORASICK:
+        hits = [value for _, value in _MEANINGS_AC.iter(lower_name)]
+        if hits:
+            return min(hits)[1]
+    else:
+        for key, meaning in FIELD_TYPE_MEANINGS.items():
+            if key.lower() in lower_name:
+                return meaning
+    
+    if lower_name.endswith('id'):
+        ref_name = lower_name[:-3] if lower_name.endswith('_id') else lower_name[:-2]
+        if ref_name:
+            return f"Reference to {ref_name}"
+    
+    return "Purpose unclear - needs review"
+
+
+def _python_block(content, start, indent):
+    """Return the block after a header ending at `start`: every following line
+    indented deeper than `indent`, up to the first dedent. Linear, no backtracking.
+    """
+    
+    length = len(content)
+    end = pos = start
+    
+    while pos < length:
+        line_start = pos + 1
+        line_end = content.find('\n', line_start)
+        if line_end == -1:
+            line_end = length
+        
+        line = content[line_start:line_end]
+        stripped = line.lstrip()
+        if stripped.strip():
+            if len(line) - len(stripped) <= indent:
+                break
+            end = line_end
+        pos = line_end
+    
+    return content[start:end]
+
+
+def _ts_members(body):
+    """Yield the top-level members of a TypeScript body.
+    
+    Splits on `;`, `,` and newlines only at depth 0, so a nested object type or
+    a method body stays inside the member it belongs to.
+    """
+    
+    depth = start = 0
+    
+    for match in _TS_SPLIT_RE.finditer(body):
+        char = match.group()
+        if char in '{([':
+            depth += 1
+        elif char in '})]':
+            if depth:
+                depth -= 1
+        elif not depth:
+            if body[start:match.start()].strip():
+                yield body[start:match.start()]
+            start = match.end()
+    
+    if body[start:].strip():
+        yield body[start:]
+
+
+def _extract_typescript_fields(body):
+    """Extract fields from TypeScript body.
+    
+    A plain function with no instance state - this loop runs once per field
+    across the whole codebase, so it sticks to locals and precompiled patterns.
+    Only top-level members count: nested object types fold into their parent
+    field's type, and methods (parameters, locals) are skipped.
+    """
+    
+    fields = []
+    append = fields.append
+    
+    for member in _ts_members(body):
+        match = _TS_MEMBER_RE.match(member)
+        if not match:
+            continue
+        
+        field_name, field_type = match.groups()
+        field_type = ' '.join(field_type.split())
+        
+        if '(' in field_type and ')' in field_type:
+            continue
+        
+        append(Field(field_name, field_type, _get_field_meaning(field_name, field_type)))
+    
+    return fields
 
 
 # ============================================================================
@@ -89,6 +326,7 @@ class Translator:
         self.entities = {}
         self.relationships = []
         self.naming_issues = []
+        self.skipped_files = 0
         
     def analyze(self):
         """Run the full analysis."""
@@ -96,7 +334,15 @@ class Translator:
         if not self.root_path.exists():
             raise ValueError(f"Path does not exist: {self.root_path}")
         
-        self._find_model_files()
+        # PyPy's incremental GC perturbs JIT warmup during the bulk scan
+        if IS_PYPY:
+            gc.disable()
+        try:
+            self._find_model_files()
+        finally:
+            if IS_PYPY:
+                gc.enable()
+        
         self._detect_naming_issues()
         self._infer_relationships()
         
@@ -105,101 +351,99 @@ class Translator:
     def _find_model_files(self):
         """Find and parse model/entity files."""
         
+        paths = []
         for folder_name in MODEL_FOLDERS:
             folder_path = self.root_path / folder_name
-            if folder_path.exists() and folder_path.is_dir():
-                self._scan_folder_for_models(folder_path)
+            if folder_path.is_dir():
+                paths.extend(self._scan_folder_for_models(folder_path))
+        
+        # Reads and parses overlap across threads; results are merged in scan
+        # order so the same entity defined twice resolves the same way every run
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for found in executor.map(self._parse_model_file, paths):
+                for name, rel_path, fields in found:
+                    self._add_entity(name, rel_path, fields)
     
     def _scan_folder_for_models(self, folder):
         """Scan a folder for model files."""
         
+        paths = []
+        
+        # scandir entries reuse the type info from the directory read - no extra stat
         try:
-            entries = list(folder.iterdir())
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name in SKIP_FOLDERS:
+                        continue
+                    
+                    if entry.is_file(follow_symlinks=False) and entry.name.endswith(_EXT_TUPLE):
+                        # Decided from the name alone - never opened
+                        if entry.name in _NON_MODEL_NAMES or entry.name.endswith(_NON_MODEL_SUFFIXES):
+                            self.skipped_files += 1
+                            continue
+                        paths.append(Path(entry.path))
         except PermissionError:
-            return
+            pass
         
-        for entry in entries:
-            if entry.name in SKIP_FOLDERS:
-                continue
-                
-            if entry.is_file():
-                if entry.suffix in ['.ts', '.js', '.py', '.prisma']:
-                    self._parse_model_file(entry)
+        return paths
     
     def _parse_model_file(self, file_path):
-        """Parse a model file and extract entity information."""
+        """Parse a model file and return its (name, relative path, fields) entities."""
+        
+        ext = file_path.suffix.lower()
+        markers = _MODEL_MARKERS.get(ext)
+        if not markers:
+            return []
         
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
+            if file_path.stat().st_size > MAX_MODEL_FILE_BYTES:
+                return []
+            raw = file_path.read_bytes()
         except:
-            return
+            return []
         
-        ext = file_path.suffix.lower()
+        # No declaration keyword anywhere - don't bother decoding or running the parsers
+        if not any(marker in raw for marker in markers):
+            return []
+        
+        # Raw bytes + one decode: skips text-mode newline translation (patterns allow \r)
+        content = raw.decode('utf-8', errors='ignore')
+        
+        # Every entity in this file shares it - resolve once, not per entity
+        rel_path = str(file_path.relative_to(self.root_path))
         
         if ext in ['.ts', '.tsx', '.js', '.jsx']:
-            self._parse_typescript_model(file_path, content)
+            return self._parse_typescript_model(rel_path, content)
         elif ext == '.py':
-            self._parse_python_model(file_path, content)
+            return self._parse_python_model(rel_path, content)
         elif ext == '.prisma':
-            self._parse_prisma_schema(file_path, content)
+            return self._parse_prisma_schema(rel_path, content)
+        return []
     
-    def _parse_typescript_model(self, file_path, content):
+    def _parse_typescript_model(self, rel_path, content):
         """Parse TypeScript model files."""
         
-        patterns = [
-            r'(?:export\s+)?interface\s+(\w+)\s*(?:extends\s+[\w\s,<>]+)?\s*\{([^}]*)\}',
-            r'(?:export\s+)?type\s+(\w+)\s*=\s*\{([^}]*)\}',
-            r'(?:export\s+)?class\s+(\w+)(?:\s+extends\s+\w+)?\s*\{([^}]*)\}',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                entity_name = match.group(1)
-                body = match.group(2)
-                
-                if entity_name.endswith('Props') or entity_name.endswith('Options'):
-                    continue
-                
-                fields = self._extract_typescript_fields(body)
-                
-                if fields:
-                    self._add_entity(entity_name, file_path, fields)
-    
-    def _extract_typescript_fields(self, body):
-        """Extract fields from TypeScript body."""
-        
-        fields = []
-        field_pattern = r'(\w+)\s*\??\s*:\s*([^;,\n]+)'
-        matches = re.finditer(field_pattern, body)
-        
-        for match in matches:
-            field_name = match.group(1)
-            field_type = match.group(2).strip()
-            
-            if '(' in field_type and ')' in field_type:
+        entities = []
+        for _, entity_name, body in _scan_ts_blocks(content):
+            if entity_name.endswith('Props') or entity_name.endswith('Options'):
                 continue
             
-            meaning = self._get_field_meaning(field_name, field_type)
+            fields = _extract_typescript_fields(body)
             
-            fields.append({
-                'name': field_name,
-                'type': field_type,
-                'meaning': meaning,
-            })
+            if fields:
+                entities.append((entity_name, rel_path, fields))
         
-        return fields
+        return entities
     
-    def _parse_python_model(self, file_path, content):
+    def _parse_python_model(self, rel_path, content):
         """Parse Python model files."""
         
-        class_pattern = r'class\s+(\w+)\s*\(([^)]*)\)\s*:((?:\n(?:\s+.+)?)*)'
-        matches = re.finditer(class_pattern, content)
-        
-        for match in matches:
-            entity_name = match.group(1)
-            parent_classes = match.group(2)
-            body = match.group(3)
+        entities = []
+        for match in _PY_CLASS_HEAD_RE.finditer(content):
+            entity_name = match.group(2)
+            parent_classes = match.group(3)
+            body = _python_block(content, match.end(), len(match.group(1)))
             
             model_indicators = ['Model', 'Base', 'Schema', 'Entity', 'Table']
             if not any(ind in parent_classes for ind in model_indicators):
@@ -209,93 +453,61 @@ class Translator:
             fields = self._extract_python_fields(body)
             
             if fields:
-                self._add_entity(entity_name, file_path, fields)
+                entities.append((entity_name, rel_path, fields))
+        
+        return entities
     
     def _extract_python_fields(self, body):
         """Extract fields from Python class body."""
         
         fields = []
-        patterns = [
-            r'(\w+)\s*[=:]\s*(?:Column|Field|models\.\w+)\s*\(',
-            r'(\w+)\s*:\s*(\w+(?:\[[\w,\s]+\])?)\s*(?:=|$)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, body)
-            for match in matches:
+        
+        for pattern in _PY_FIELD_RES:
+            for match in pattern.finditer(body):
                 field_name = match.group(1)
                 field_type = match.group(2) if len(match.groups()) > 1 else 'unknown'
                 
                 if field_name.startswith('_'):
                     continue
                 
-                meaning = self._get_field_meaning(field_name, field_type)
+                meaning = _get_field_meaning(field_name, field_type)
                 
-                fields.append({
-                    'name': field_name,
-                    'type': field_type,
-                    'meaning': meaning,
-                })
+                fields.append(Field(field_name, field_type, meaning))
         
         return fields
     
-    def _parse_prisma_schema(self, file_path, content):
+    def _parse_prisma_schema(self, rel_path, content):
         """Parse Prisma schema files."""
         
-        model_pattern = r'model\s+(\w+)\s*\{([^}]+)\}'
-        matches = re.finditer(model_pattern, content)
-        
-        for match in matches:
+        entities = []
+        for match in _PRISMA_MODEL_RE.finditer(content):
             entity_name = match.group(1)
             body = match.group(2)
             
             fields = []
-            field_pattern = r'^\s*(\w+)\s+(\w+(?:\[\])?(?:\?)?)\s*(.*)$'
             
-            for line in body.split('\n'):
-                field_match = re.match(field_pattern, line)
-                if field_match:
-                    field_name = field_match.group(1)
-                    field_type = field_match.group(2)
-                    
-                    meaning = self._get_field_meaning(field_name, field_type)
-                    
-                    fields.append({
-                        'name': field_name,
-                        'type': field_type,
-                        'meaning': meaning,
-                    })
+            # One pass over the whole body instead of splitting it into lines
+            for field_match in _PRISMA_FIELD_RE.finditer(body):
+                field_name = field_match.group(1)
+                field_type = field_match.group(2)
+                
+                meaning = _get_field_meaning(field_name, field_type)
+                
+                fields.append(Field(field_name, field_type, meaning))
             
             if fields:
-                self._add_entity(entity_name, file_path, fields)
-    
-    def _get_field_meaning(self, field_name, field_type):
-        """Get the business meaning of a field."""
-        
-        lower_name = field_name.lower()
-        
-        if lower_name in FIELD_TYPE_MEANINGS:
-            return FIELD_TYPE_MEANINGS[lower_name]
+                entities.append((entity_name, rel_path, fields))
         
-        for key, meaning in FIELD_TYPE_MEANINGS.items():
-            if key.lower() in lower_name:
-                return meaning
-        
-        if lower_name.endswith('_id') or lower_name.endswith('id'):
-            ref_name = lower_name.replace('_id', '').replace('id', '')
-            if ref_name:
-                return f"Reference to {ref_name}"
-        
-        return "Purpose unclear - needs review"
+        return entities
     
-    def _add_entity(self, name, file_path, fields):
+    def _add_entity(self, name, rel_path, fields):
         """Add an entity to our collection."""
         
         description = self._generate_entity_description(name, fields)
         
         self.entities[name] = {
             'name': name,
-            'file': str(file_path.relative_to(self.root_path)),
+            'file': rel_path,
             'fields': fields,
             'description': description,
         }
@@ -332,17 +544,14 @@ class Translator:
     def _detect_naming_issues(self):
         """Detect potential naming inconsistencies."""
         
-        entity_names = list(self.entities.keys())
-        
-        similar_groups = [
-            ['User', 'Users', 'Account', 'Accounts', 'Member', 'Members'],
-            ['Customer', 'Customers', 'Client', 'Clients'],
-            ['Order', 'Orders', 'Purchase', 'Purchases'],
-            ['Product', 'Products', 'Item', 'Items'],
-        ]
+        groups = defaultdict(list)
+        for name in self.entities:
+            group_id = _ALIAS_TO_GROUP.get(name)
+            if group_id is not None:
+                groups[group_id].append(name)
         
-        for group in similar_groups:
-            found = [name for name in entity_names if name in group]
+        for group_id in sorted(groups):
+            found = groups[group_id]
             if len(found) > 1:
                 self.naming_issues.append({
                     'entities': found,
@@ -352,20 +561,22 @@ class Translator:
     def _infer_relationships(self):
         """Infer relationships between entities."""
         
+        name_index = {name.lower(): name for name in self.entities}
+        
         for entity_name, entity in self.entities.items():
             for field in entity['fields']:
-                field_name = field['name'].lower()
+                field_name = field.name.lower()
                 
-                if field_name.endswith('_id') or field_name.endswith('id'):
-                    ref_name = field_name.replace('_id', '').replace('id', '')
+                if field_name.endswith('id'):
+                    ref_name = field_name[:-3] if field_name.endswith('_id') else field_name[:-2]
                     
-                    for other_name in self.entities.keys():
-                        if other_name.lower() == ref_name:
-                            self.relationships.append({
-                                'from': entity_name,
-                                'to': other_name,
-                                'via': field['name'],
-                            })
+                    target = name_index.get(ref_name)
+                    if target:
+                        self.relationships.append({
+                            'from': entity_name,
+                            'to': target,
+                            'via': field.name,
+                        })
     
     def _build_result(self):
         """Build the final analysis result."""
@@ -384,84 +595,86 @@ class Translator:
 # REPORT GENERATOR
 # ============================================================================
 
-def generate_report(result):
-    """Generate a human-readable markdown report."""
+def write_report(result, out):
+    """Write a human-readable markdown report to `out` as it is built."""
     
-    report = []
+    write = out.write
     
-    report.append("# Business Dictionary")
-    report.append("")
-    report.append(f"**Codebase:** {result['path']}")
-    report.append(f"**Generated:** {result['analyzed_at']}")
-    report.append("")
-    
-    report.append("---")
-    report.append("")
-    report.append("## Summary")
-    report.append("")
-    report.append(f"Found **{result['entity_count']}** business entities.")
-    report.append("")
+    write(
+        "# Business Dictionary\n"
+        "\n"
+        f"**Codebase:** {result['path']}\n"
+        f"**Generated:** {result['analyzed_at']}\n"
+        "\n"
+        "---\n"
+        "\n"
+        "## Summary\n"
+        "\n"
+        f"Found **{result['entity_count']}** business entities.\n"
+        "\n"
+    )
     
     if result['entities']:
-        report.append("---")
-        report.append("")
-        report.append("## Business Entities")
-        report.append("")
+        write("---\n\n## Business Entities\n\n")
         
         for name, entity in sorted(result['entities'].items()):
-            report.append(f"### {name}")
-            report.append("")
-            report.append(f"**What it is:** {entity['description']}")
-            report.append("")
-            report.append(f"**File:** `{entity['file']}`")
-            report.append("")
+            fields = entity['fields']
+            description = entity['description']
+            file = entity['file']
             
-            if entity['fields']:
-                report.append("| Field | Type | Meaning |")
-                report.append("|-------|------|---------|")
-                
-                for field in entity['fields'][:10]:
-                    report.append(f"| {field['name']} | {field['type']} | {field['meaning']} |")
-                
-                report.append("")
+            write(
+                f"### {name}\n"
+                f"\n"
+                f"**What it is:** {description}\n"
+                f"\n"
+                f"**File:** `{file}`\n"
+                f"\n"
+            )
+            
+            if fields:
+                write("| Field | Type | Meaning |\n|-------|------|---------|\n")
+                for field in fields[:10]:
+                    write(f"| {field.name} | {field.type} | {field.meaning} |\n")
+                write("\n")
     else:
-        report.append("No entities found. Manual review needed.")
-        report.append("")
+        write("No entities found. Manual review needed.\n\n")
     
     if result['relationships']:
-        report.append("---")
-        report.append("")
-        report.append("## Relationships")
-        report.append("")
-        report.append("| From | To | Via |")
-        report.append("|------|-----|-----|")
-        
+        write(
+            "---\n"
+            "\n"
+            "## Relationships\n"
+            "\n"
+            "| From | To | Via |\n"
+            "|------|-----|-----|\n"
+        )
         for rel in result['relationships']:
-            report.append(f"| {rel['from']} | {rel['to']} | {rel['via']} |")
-        
-        report.append("")
+            write(f"| {rel['from']} | {rel['to']} | {rel['via']} |\n")
+        write("\n")
     
     if result['naming_issues']:
-        report.append("---")
-        report.append("")
-        report.append("## Naming Issues")
-        report.append("")
-        
+        write("---\n\n## Naming Issues\n\n")
         for issue in result['naming_issues']:
-            report.append(f"- [!] {issue['message']}")
-        
-        report.append("")
+            write(f"- [!] {issue['message']}\n")
+        write("\n")
     
-    report.append("---")
-    report.append("")
-    report.append("## Next Steps")
-    report.append("")
-    report.append("1. Review entities marked 'unclear'")
-    report.append("2. Clarify naming issues with the team")
-    report.append("3. Run the **Flow Tracer Agent** next")
-    report.append("")
+    write(
+        "---\n"
+        "\n"
+        "## Next Steps\n"
+        "\n"
+        "1. Review entities marked 'unclear'\n"
+        "2. Clarify naming issues with the team\n"
+        "3. Run the **Flow Tracer Agent** next\n"
+    )
+
+
+def generate_report(result):
+    """Generate a human-readable markdown report."""
     
-    return "\n".join(report)
+    buffer = io.StringIO()
+    write_report(result, buffer)
+    return buffer.getvalue()
 
 
 # ============================================================================
@@ -487,15 +700,15 @@ def main():
     try:
         translator = Translator(codebase_path)
         result = translator.analyze()
-        report = generate_report(result)
         
         if output_file:
             with open(output_file, 'w') as f:
-                f.write(report)
+                write_report(result, f)
             print(f"[OK] Dictionary saved to: {output_file}")
             print(f"   Found {result['entity_count']} entities")
+            print(f"   Skipped {translator.skipped_files} test/config files")
         else:
-            print(report)
+            print(generate_report(result))
             
     except Exception as e:
         print(f"[X] Error: {e}")
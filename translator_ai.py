@@ -12,12 +12,26 @@ Setup:
 
 Usage:
     python translator_ai.py /path/to/codebase --output glossary.md
+    python translator_ai.py /path/to/codebase --output glossary.md --batch
+    python translator_ai.py /path/to/codebase --output glossary.md --model claude-sonnet-4-5
+
+--batch submits all entities through the Message Batches API (half the cost,
+slower turnaround); a batch still running after an hour is cancelled and the
+remaining entities are analyzed with direct requests instead.
+--model picks the Claude model; a one-sentence description per entity does not
+need more than Haiku, which is the default.
 """
 
 import os
 import sys
+import io
 import re
 import json
+import asyncio
+import argparse
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -27,25 +41,248 @@ API_KEY = os.environ.get('ANTHROPIC_API_KEY')
 # Try to import anthropic library
 try:
     import anthropic
+    import httpx
     HAS_ANTHROPIC = True
 except ImportError:
     HAS_ANTHROPIC = False
 
+# orjson reads and writes the explanation cache several times faster than stdlib json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 SKIP_FOLDERS = {'node_modules', '.git', '__pycache__', 'dist', 'build', 'venv', '.venv', 'coverage'}
 
+# Folders where models/entities typically live
+MODEL_FOLDERS = (
+    'models', 'model', 'entities', 'types', 'domain',
+    'src/models', 'src/entities', 'src/types',
+    'server/models', 'app/models', 'prisma',
+)
+
+# Extensions scanned in model folders
+MODEL_EXTENSIONS = ('.ts', '.js', '.py', '.prisma')
+
+# Read at most this many characters per file; bigger files are generated or
+# minified and their tail adds nothing. Prisma schemas are dense, so allow more.
+MAX_MODEL_FILE_CHARS = 1 << 20
+MAX_PRISMA_FILE_CHARS = 8 << 20
+READ_BUFFER_SIZE = 1 << 16
+
+DEFAULT_MODEL = "claude-haiku-4-5"
+
+# Explanations already paid for, keyed by a hash of the entity code, fields and model.
+# Kept in least-recently-used order and trimmed to MAX_CACHE_ENTRIES on save, so a
+# server analyzing many uploads doesn't grow (and reload) it without bound
+CACHE_FILE = Path.home() / '.cache' / 'rs10x' / 'translator.json'
+MAX_CACHE_ENTRIES = 5000
+
+UNPARSED_RESPONSE = "Could not parse AI response"
+
+# Output budget per entity: a description plus one short sentence per field.
+# Never below MIN_OUTPUT_TOKENS, so small entities keep plenty of headroom.
+MIN_OUTPUT_TOKENS = 1000
+OUTPUT_TOKENS_PER_FIELD = 40
+
+# Entity code sent per prompt; the field list already names every field, so
+# the declaration head is enough context and fat generated models stay cheap
+MAX_PROMPT_CODE_CHARS = 4096
+
+# Max Claude requests in flight at once during AI analysis
+MAX_CONCURRENT_REQUESTS = 20
+
+# --batch polls every BATCH_POLL_SECONDS and gives up on the batch after
+# BATCH_DEADLINE_SECONDS, falling back to direct requests
+BATCH_POLL_SECONDS = 10
+BATCH_DEADLINE_SECONDS = 60 * 60
+
+# Keywords the basic analyzer looks for in lowercased names (earlier keys win)
+ENTITY_DESCRIPTIONS = {
+    'user': "Represents a person who can log into the system",
+    'customer': "Represents a customer who makes purchases",
+    'order': "Represents a purchase order",
+    'product': "Represents an item that can be purchased",
+    'cart': "Represents a shopping cart",
+    'payment': "Represents a payment transaction",
+    'address': "Represents a physical address",
+    'category': "Represents a grouping/category",
+    'review': "Represents a product review",
+    'session': "Represents a login session",
+    'discount': "Represents a discount or promotion",
+}
+
+FIELD_MEANINGS = {
+    'id': 'Unique identifier',
+    'email': 'Email address',
+    'name': 'Name',
+    'price': 'Price/cost',
+    'quantity': 'Number of items',
+    'total': 'Total amount',
+    'status': 'Current status',
+    'createdat': 'When this was created',
+    'updatedat': 'When this was last modified',
+}
+
+UNCLEAR = "Purpose unclear - needs review"
+
+
+def _keyword_matcher(keywords: dict) -> tuple:
+    """Compile the keys into one zero-width alternation; group N+1 is the Nth key."""
+    regex = re.compile('(?=' + '|'.join(f'({re.escape(k)})' for k in keywords) + ')')
+    return regex, (None,) + tuple(keywords.values())
+
+
+def _match_keyword(matcher: tuple, text: str, default: str) -> str:
+    """Value of the first key (in dict order) found anywhere in text."""
+    regex, values = matcher
+    hits = [match.lastindex for match in regex.finditer(text)]
+    return values[min(hits)] if hits else default
+
+
+_ENTITY_KEYWORDS = _keyword_matcher(ENTITY_DESCRIPTIONS)
+_FIELD_KEYWORDS = _keyword_matcher(FIELD_MEANINGS)
+
+# Claude answers through this tool, so the reply is already structured - no prose to strip
+ENTITY_TOOL = {
+    "name": "record_entity",
+    "description": "Record the business explanation of one code entity and its fields.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "description": {
+                "type": "string",
+                "description": "One sentence explaining what this entity represents",
+            },
+            "fields": {
+                "type": "object",
+                "description": "Field name -> what this field means",
+                "additionalProperties": {"type": "string"},
+            },
+        },
+        "required": ["description", "fields"],
+    },
+}
+
+# Patterns are compiled once at import; they run on every model file and entity.
+# TypeScript headers are found in one pass and matched only up to the opening brace -
+# bodies are brace-matched. What may sit between name and brace depends on the kind.
+# Tail and brace sit in a lookahead, so a rejected match (say `class` in a
+# comment) resumes right after the name instead of swallowing the real header
+_TS_HEADER_RE = re.compile(r'\b(?P<kind>interface|type|class)\s+(?P<name>\w+)(?=(?P<tail>[^{};]*)\{)')
+_TS_HEADER_TAILS = {
+    'interface': re.compile(r'\s*(?:<[\w\s,.<>=]*>)?\s*(?:extends\s+[\w\s,.<>]+)?\s*'),
+    'type': re.compile(r'\s*(?:<[\w\s,.<>=]*>)?\s*=\s*'),
+    'class': re.compile(
+        r'\s*(?:<[\w\s,.<>=]*>)?(?:\s*extends\s+[\w.]+(?:<[\w\s,.<>]*>)?)?'
+        r'(?:\s*implements\s+[\w\s,.<>]+)?\s*'
+    ),
+}
+_MEMBER_SPLIT_RE = re.compile(r'[{}()\[\];,\n]')
+_MEMBER_RE = re.compile(
+    r'\s*(?:@[\w.]+(?:\((?:[^()]|\([^()]*\))*\))?\s*)*'
+    r'(?:(?:public|private|protected|readonly|static|declare|abstract|override)\s+)*'
+    r'(\w+)\s*[?!]?\s*:\s*(.+)',
+    re.DOTALL,
+)
+# Only the `class X(...):` line is matched; the body is found by indentation
+_PY_CLASS_HEAD_RE = re.compile(r'^([ \t]*)class[ \t]+(\w+)[ \t]*\([^)]*\)[ \t]*:[ \t]*\r?$', re.MULTILINE)
+_PY_FIELD_RES = (
+    re.compile(r'(\w+)\s*[=:]\s*(?:Column|Field|models\.\w+)'),
+    re.compile(r'(\w+)\s*:\s*(\w+)'),
+)
+_PRISMA_MODEL_RE = re.compile(r'model\s+(\w+)\s*\{([^}]+)\}')
+_PRISMA_FIELD_RE = re.compile(r'^[ \t]*(\w+)[ \t]+(\w+(?:\[\])?\??)', re.MULTILINE)
+
+
+def _matching_brace(content: str, open_brace: int) -> int:
+    """Index of the '}' closing the '{' at open_brace, or -1 if it is never closed."""
+    depth = 1
+    i = open_brace + 1
+    while depth:
+        next_open = content.find('{', i)
+        next_close = content.find('}', i)
+        if next_close == -1:
+            return -1
+        if next_open != -1 and next_open < next_close:
+            depth += 1
+            i = next_open + 1
+        else:
+            depth -= 1
+            i = next_close + 1
+    return i - 1
+
+
+def _top_level_members(body: str):
+    """Members of a TypeScript body, split on `;`, `,` and newlines at depth 0 only,
+    so a nested object type or a method body stays in one piece."""
+    depth = start = 0
+    
+    for match in _MEMBER_SPLIT_RE.finditer(body):
+        char = match.group()
+        if char in '{([':
+            depth += 1
+        elif char in '})]':
+            if depth:
+                depth -= 1
+        elif not depth:
+            if body[start:match.start()].strip():
+                yield body[start:match.start()]
+            start = match.end()
+    
+    if body[start:].strip():
+        yield body[start:]
+
+
+def _python_block(content: str, start: int, indent: int) -> str:
+    """Every line after `start` indented deeper than `indent`, up to the first dedent."""
+    length = len(content)
+    end = pos = start
+    
+    while pos < length:
+        line_start = pos + 1
+        line_end = content.find('\n', line_start)
+        if line_end == -1:
+            line_end = length
+        
+        line = content[line_start:line_end]
+        stripped = line.lstrip()
+        if stripped.strip():
+            if len(line) - len(stripped) <= indent:
+                break
+            end = line_end
+        pos = line_end
+    
+    return content[start:end]
+
 
 class AITranslator:
     """AI-powered translator that uses Claude to explain code."""
     
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, batch: bool = False, model: str = DEFAULT_MODEL,
+                 concurrency: int = MAX_CONCURRENT_REQUESTS, use_ai: bool = True):
         self.root_path = Path(root_path).resolve()
+        self.batch = batch
+        self.model = model
+        self.concurrency = concurrency
         self.entities = {}
         self.relationships = []
-        self.raw_code = {}  # Store raw code for AI analysis
+        self.cache = {}
+        self.cache_dirty = False
         
         # Initialize Claude client if available
-        if HAS_ANTHROPIC and API_KEY:
-            self.client = anthropic.Anthropic(api_key=API_KEY)
+        if use_ai and HAS_ANTHROPIC and API_KEY:
+            # One client for the whole run: keep-alive connections for every concurrent
+            # request, fail a stalled call after a minute, and retry 429/529 a few times
+            self.client = anthropic.AsyncAnthropic(
+                api_key=API_KEY,
+                http_client=anthropic.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                max_retries=3,
+            )
             self.ai_enabled = True
         else:
             self.client = None
@@ -60,8 +297,15 @@ class AITranslator:
         self._find_model_files()
         
         if self.ai_enabled:
-            print("[AI] Running AI analysis (this may take a minute)...")
-            self._ai_analyze_entities()
+            self.cache = self._load_cache()
+            if self.batch:
+                print("[AI] Submitting AI analysis as a batch (this may take a while)...")
+                asyncio.run(self._ai_analyze_entities_batch())
+            else:
+                print("[AI] Running AI analysis (this may take a minute)...")
+                asyncio.run(self._ai_analyze_entities())
+            if self.cache_dirty:
+                self._save_cache()
         else:
             print("[!]  AI not available, using basic analysis")
             self._basic_analyze_entities()
@@ -71,131 +315,161 @@ class AITranslator:
         return self._build_result()
     
     def _find_model_files(self):
-        """Find all model/entity files."""
-        model_folders = [
-            'models', 'model', 'entities', 'types', 'domain',
-            'src/models', 'src/entities', 'src/types',
-            'server/models', 'app/models', 'prisma',
-        ]
-        
-        for folder_name in model_folders:
+        """Find and parse all model/entity files."""
+        paths = []
+        for folder_name in MODEL_FOLDERS:
             folder_path = self.root_path / folder_name
-            if folder_path.exists() and folder_path.is_dir():
-                self._scan_folder(folder_path)
+            if folder_path.is_dir():
+                paths.extend(self._scan_folder(folder_path))
+        
+        # Reads and parses overlap across threads; results are merged in scan
+        # order so the same entity defined twice resolves the same way every run
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for found in executor.map(self._parse_model_file, paths):
+                for entity in found:
+                    self.entities[entity['name']] = entity
         
         # Also check for prisma schema
         prisma_schema = self.root_path / 'prisma' / 'schema.prisma'
         if prisma_schema.exists():
-            self._parse_prisma_schema(prisma_schema)
+            for entity in self._parse_prisma_schema(prisma_schema):
+                self.entities[entity['name']] = entity
     
     def _scan_folder(self, folder: Path):
         """Scan a folder for model files."""
+        paths = []
+        
+        # scandir entries reuse the type info from the directory read - no extra stat
         try:
-            for entry in folder.iterdir():
-                if entry.name in SKIP_FOLDERS:
-                    continue
-                if entry.is_file() and entry.suffix in ['.ts', '.js', '.py', '.prisma']:
-                    self._parse_model_file(entry)
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name in SKIP_FOLDERS:
+                        continue
+                    if entry.is_file(follow_symlinks=False) and entry.name.endswith(MODEL_EXTENSIONS):
+                        paths.append(Path(entry.path))
         except PermissionError:
             pass
+        
+        return paths
     
-    def _parse_model_file(self, file_path: Path):
-        """Parse a model file and extract entities."""
+    def _parse_model_file(self, file_path: Path) -> list:
+        """Parse a model file and return the entities it defines."""
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
+            content = self._read_capped(file_path, MAX_MODEL_FILE_CHARS)
             relative_path = str(file_path.relative_to(self.root_path))
             
-            # Store raw code for AI analysis
-            self.raw_code[relative_path] = content
-            
             # Extract entity names and their code
             if file_path.suffix in ['.ts', '.tsx', '.js', '.jsx']:
-                self._extract_typescript_entities(content, relative_path)
+                return self._extract_typescript_entities(content, relative_path)
             elif file_path.suffix == '.py':
-                self._extract_python_entities(content, relative_path)
+                return self._extract_python_entities(content, relative_path)
         except Exception as e:
             print(f"  Warning: Could not parse {file_path}: {e}")
+        
+        return []
+    
+    def _read_capped(self, file_path: Path, limit: int) -> str:
+        """Read up to `limit` characters of a file, warning if it was cut short."""
+        with open(file_path, 'r', encoding='utf-8', errors='ignore', buffering=READ_BUFFER_SIZE) as f:
+            content = f.read(limit + 1)
+        
+        if len(content) > limit:
+            print(f"  Warning: {file_path.name} is larger than {limit} characters, only the start was parsed")
+            content = content[:limit]
+        
+        return content
     
-    def _extract_typescript_entities(self, content: str, file_path: str):
+    def _extract_typescript_entities(self, content: str, file_path: str) -> list:
         """Extract TypeScript/JavaScript entities."""
-        patterns = [
-            r'(?:export\s+)?interface\s+(\w+)\s*(?:extends\s+[\w\s,<>]+)?\s*\{([^}]*)\}',
-            r'(?:export\s+)?type\s+(\w+)\s*=\s*\{([^}]*)\}',
-            r'(?:export\s+)?class\s+(\w+)(?:\s+extends\s+\w+)?\s*\{([^}]*)\}',
-        ]
+        entities = []
+        for match in _TS_HEADER_RE.finditer(content):
+            if not _TS_HEADER_TAILS[match.group('kind')].fullmatch(match.group('tail')):
+                continue
+            
+            name = match.group('name')
+            
+            # Linear brace walk, so nested object types stay inside the body
+            open_brace = match.end('tail')
+            close_brace = _matching_brace(content, open_brace)
+            if close_brace == -1:
+                continue
+            body = content[open_brace + 1:close_brace]
+            
+            # Skip utility types
+            if name.endswith(('Props', 'Options', 'Config', 'State')):
+                continue
+            
+            fields = self._extract_fields(body)
+            if fields:
+                entities.append({
+                    'name': name,
+                    'file': file_path,
+                    'fields': fields,
+                    'raw_code': f"interface {name} {{{body}}}",
+                    'description': None,  # Will be filled by AI
+                })
         
-        for pattern in patterns:
-            for match in re.finditer(pattern, content, re.DOTALL):
-                name = match.group(1)
-                body = match.group(2)
-                
-                # Skip utility types
-                if name.endswith(('Props', 'Options', 'Config', 'State')):
-                    continue
-                
-                fields = self._extract_fields(body)
-                if fields:
-                    self.entities[name] = {
-                        'name': name,
-                        'file': file_path,
-                        'fields': fields,
-                        'raw_code': f"interface {name} {{{body}}}",
-                        'description': None,  # Will be filled by AI
-                    }
-    
-    def _extract_python_entities(self, content: str, file_path: str):
+        return entities
+    
+    def _extract_python_entities(self, content: str, file_path: str) -> list:
         """Extract Python class entities."""
-        pattern = r'class\s+(\w+)\s*\([^)]*\)\s*:((?:\n(?:\s+.+)?)*)'
-        
-        for match in re.finditer(pattern, content):
-            name = match.group(1)
-            body = match.group(2)
+        entities = []
+        for match in _PY_CLASS_HEAD_RE.finditer(content):
+            name = match.group(2)
+            body = _python_block(content, match.end(), len(match.group(1)))
             
             fields = self._extract_python_fields(body)
             if fields:
-                self.entities[name] = {
+                entities.append({
                     'name': name,
                     'file': file_path,
                     'fields': fields,
                     'raw_code': f"class {name}:\n{body}",
                     'description': None,
-                }
+                })
+        
+        return entities
     
-    def _parse_prisma_schema(self, file_path: Path):
+    def _parse_prisma_schema(self, file_path: Path) -> list:
         """Parse Prisma schema file."""
+        entities = []
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
+            content = self._read_capped(file_path, MAX_PRISMA_FILE_CHARS)
             relative_path = str(file_path.relative_to(self.root_path))
             
-            self.raw_code[relative_path] = content
-            
             # Extract models
-            pattern = r'model\s+(\w+)\s*\{([^}]+)\}'
-            for match in re.finditer(pattern, content):
+            for match in _PRISMA_MODEL_RE.finditer(content):
                 name = match.group(1)
                 body = match.group(2)
                 
                 fields = self._extract_prisma_fields(body)
-                self.entities[name] = {
+                entities.append({
                     'name': name,
                     'file': relative_path,
                     'fields': fields,
                     'raw_code': f"model {name} {{{body}}}",
                     'description': None,
-                }
+                })
         except Exception as e:
             print(f"  Warning: Could not parse Prisma schema: {e}")
+        
+        return entities
     
     def _extract_fields(self, body: str) -> list:
         """Extract fields from TypeScript body."""
         fields = []
-        pattern = r'(\w+)\s*\??\s*:\s*([^;,\n]+)'
         
-        for match in re.finditer(pattern, body):
+        for member in _top_level_members(body):
+            match = _MEMBER_RE.match(member)
+            if not match:  # Methods, comments, initialisers without a type
+                continue
+            
             name = match.group(1)
-            type_str = match.group(2).strip()
+            # A nested object type stays folded into its parent field
+            type_str = ' '.join(match.group(2).split())
             
-            if '(' in type_str and ')' in type_str:  # Skip methods
+            if '(' in type_str and ')' in type_str:  # Skip function-typed members
                 continue
             
             fields.append({
@@ -209,13 +483,9 @@ class AITranslator:
     def _extract_python_fields(self, body: str) -> list:
         """Extract fields from Python class body."""
         fields = []
-        patterns = [
-            r'(\w+)\s*[=:]\s*(?:Column|Field|models\.\w+)',
-            r'(\w+)\s*:\s*(\w+)',
-        ]
         
-        for pattern in patterns:
-            for match in re.finditer(pattern, body):
+        for pattern in _PY_FIELD_RES:
+            for match in pattern.finditer(body):
                 name = match.group(1)
                 if name.startswith('_'):
                     continue
@@ -230,28 +500,145 @@ class AITranslator:
     
     def _extract_prisma_fields(self, body: str) -> list:
         """Extract fields from Prisma model body."""
-        fields = []
-        pattern = r'^\s*(\w+)\s+(\w+(?:\[\])?(?:\?)?)'
+        # One pass over the whole body instead of splitting it into lines
+        return [
+            {'name': match.group(1), 'type': match.group(2), 'meaning': None}
+            for match in _PRISMA_FIELD_RE.finditer(body)
+        ]
+    
+    async def _ai_analyze_entities(self):
+        """Use Claude to analyze and explain entities, one request first and then the rest at once."""
+        # Entities the keyword tables fully explain never reach Claude
+        items = [
+            (name, entity) for name, entity in self.entities.items()
+            if not self._explain_without_ai(name, entity)
+        ]
+        if not items:
+            return
         
-        for line in body.split('\n'):
-            match = re.match(pattern, line)
-            if match:
-                name = match.group(1)
-                type_str = match.group(2)
-                fields.append({
-                    'name': name,
-                    'type': type_str,
-                    'meaning': None,
-                })
+        system = self._system_prompt()
         
-        return fields
+        # Analyze the rest concurrently, bounded to respect rate limits
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def analyze_one(name, entity):
+            async with semaphore:
+                return await self._ask_claude_about_entity(
+                    name,
+                    entity['raw_code'],
+                    entity['fields'],
+                    system
+                )
+        
+        # The first uncached request writes the shared system prompt to the prompt
+        # cache; send it alone so the others read that cache instead of all paying
+        # the cache-write premium at once
+        first = next(
+            (
+                i for i, (name, entity) in enumerate(items)
+                if self._cache_key(entity['raw_code'], entity['fields']) not in self.cache
+            ),
+            None
+        )
+        results = [None] * len(items)
+        if first is not None:
+            results[first], = await asyncio.gather(
+                analyze_one(*items[first]),
+                return_exceptions=True
+            )
+        
+        rest = [i for i in range(len(items)) if i != first]
+        rest_results = await asyncio.gather(
+            *(analyze_one(*items[i]) for i in rest),
+            return_exceptions=True
+        )
+        for i, result in zip(rest, rest_results):
+            results[i] = result
+        
+        for (name, entity), result in zip(items, results):
+            self._apply_ai_result(name, entity, result)
     
-    def _ai_analyze_entities(self):
-        """Use Claude to analyze and explain entities."""
-        if not self.entities:
+    async def _ai_analyze_entities_batch(self):
+        """Use the Message Batches API to analyze all entities in one submission."""
+        # Entities the keyword tables fully explain, or that were explained on
+        # an earlier run, never enter the batch
+        # Keyed by an index-based custom_id - entity names may break the API's
+        # ^[a-zA-Z0-9_-]{1,64}$ rule and one bad id rejects the whole batch
+        uncached = {}
+        for name, entity in self.entities.items():
+            if self._explain_without_ai(name, entity):
+                continue
+            key = self._cache_key(entity['raw_code'], entity['fields'])
+            cached = self._cached(key)
+            if cached:
+                self._apply_ai_result(name, entity, cached)
+            else:
+                uncached[f"e{len(uncached)}"] = (name, key, entity)
+        
+        if not uncached:
             return
         
-        # Build context about all entities
+        system = self._system_prompt()
+        batches = self.client.beta.messages.batches
+        
+        try:
+            batch = await batches.create(requests=[
+                {
+                    'custom_id': custom_id,
+                    'params': self._entity_request_params(
+                        name,
+                        entity['raw_code'],
+                        entity['fields'],
+                        system
+                    ),
+                }
+                for custom_id, (name, key, entity) in uncached.items()
+            ])
+        except Exception as e:
+            print(f"  Could not submit batch ({e}), sending requests directly")
+            await self._ai_analyze_entities()
+            return
+        print(f"  Submitted batch {batch.id} ({len(uncached)} entities)")
+        
+        deadline = time.monotonic() + BATCH_DEADLINE_SECONDS
+        while batch.processing_status != 'ended':
+            if time.monotonic() > deadline:
+                print(f"  Batch {batch.id} still running, cancelling it and sending requests directly")
+                try:
+                    await batches.cancel(batch.id)
+                except Exception as e:
+                    print(f"  Warning: Could not cancel batch {batch.id}: {e}")
+                await self._ai_analyze_entities()
+                return
+            await asyncio.sleep(BATCH_POLL_SECONDS)
+            batch = await batches.retrieve(batch.id)
+        
+        pending = dict(uncached)
+        async for item in await batches.results(batch.id):
+            if item.custom_id not in pending:
+                continue
+            name, key, entity = pending.pop(item.custom_id)
+            
+            if item.result.type == 'succeeded':
+                try:
+                    result = self._parse_entity_response(item.result.message)
+                    self._remember(key, result)
+                except Exception as e:
+                    result = e
+            else:
+                result = RuntimeError(f"batch request {item.result.type}")
+            
+            self._apply_ai_result(name, entity, result)
+        
+        for name, key, entity in pending.values():
+            self._apply_ai_result(name, entity, RuntimeError("missing from batch results"))
+    
+    def _system_prompt(self) -> list:
+        """Instructions plus a summary of every entity, shared by all entity prompts.
+        
+        Identical across requests, so it is marked for prompt caching and only the
+        per-entity user message is billed in full after the first call.
+        """
         entities_summary = []
         for name, entity in self.entities.items():
             field_list = ", ".join([f"{f['name']}: {f['type']}" for f in entity['fields'][:10]])
@@ -259,126 +646,181 @@ class AITranslator:
         
         entities_context = "\n".join(entities_summary)
         
-        # Analyze each entity with AI
-        for name, entity in self.entities.items():
-            try:
-                description, field_meanings = self._ask_claude_about_entity(
-                    name, 
-                    entity['raw_code'],
-                    entity['fields'],
-                    entities_context
-                )
-                
-                entity['description'] = description
-                
-                # Update field meanings
-                for field in entity['fields']:
-                    if field['name'] in field_meanings:
-                        field['meaning'] = field_meanings[field['name']]
-                    else:
-                        field['meaning'] = "Purpose unclear"
-                
-                print(f"  [OK] Analyzed: {name}")
-                
-            except Exception as e:
-                print(f"  [X] Failed to analyze {name}: {e}")
-                entity['description'] = "Could not analyze with AI"
-                for field in entity['fields']:
-                    field['meaning'] = "Analysis failed"
+        text = f"""You are analyzing a codebase for a business analyst who is not technical.
+
+Here are all the entities in this system:
+{entities_context}
+
+For the entity you are asked about, provide:
+1. A one-sentence plain English description of what it represents in business terms (not technical terms)
+2. For each field, a brief plain English explanation of what it means
+
+Record your answer with the record_entity tool.
+Keep explanations simple and business-focused, not technical.
+"""
+        
+        return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
     
-    def _ask_claude_about_entity(self, name: str, code: str, fields: list, context: str) -> tuple:
-        """Ask Claude to explain an entity."""
+    def _explain_without_ai(self, name: str, entity: dict) -> bool:
+        """Fill in an entity from the keyword tables, but only if they explain all of it.
+        
+        Only whole names count: a keyword inside a longer name (`userId`, `paidAt`)
+        is a guess, so those entities still go to Claude.
+        """
+        description = ENTITY_DESCRIPTIONS.get(name.lower())
+        if description is None:
+            return False
+        
+        meanings = []
+        for field in entity['fields']:
+            meaning = FIELD_MEANINGS.get(field['name'].lower().replace('_', ''))
+            if meaning is None:
+                return False
+            meanings.append(meaning)
+        
+        entity['description'] = description
+        for field, meaning in zip(entity['fields'], meanings):
+            field['meaning'] = meaning
+        
+        print(f"  [OK] Matched without AI: {name}")
+        return True
+    
+    def _apply_ai_result(self, name: str, entity: dict, result):
+        """Fill in an entity from a (description, field_meanings) result or an exception."""
+        if isinstance(result, BaseException):
+            print(f"  [X] Failed to analyze {name}: {result}")
+            entity['description'] = "Could not analyze with AI"
+            for field in entity['fields']:
+                field['meaning'] = "Analysis failed"
+            return
+        
+        description, field_meanings = result
+        entity['description'] = description
+        
+        # Update field meanings
+        for field in entity['fields']:
+            if field['name'] in field_meanings:
+                field['meaning'] = field_meanings[field['name']]
+            else:
+                field['meaning'] = "Purpose unclear"
+        
+        print(f"  [OK] Analyzed: {name}")
+    
+    async def _ask_claude_about_entity(self, name: str, code: str, fields: list, system: list) -> tuple:
+        """Ask Claude to explain an entity, unless an earlier run already did."""
+        
+        key = self._cache_key(code, fields)
+        cached = self._cached(key)
+        if cached:
+            return cached
+        
+        response = await self.client.messages.create(
+            **self._entity_request_params(name, code, fields, system)
+        )
+        
+        result = self._parse_entity_response(response)
+        self._remember(key, result)
+        return result
+    
+    def _cache_key(self, code: str, fields: list) -> str:
+        """Hash of everything that decides the answer for one entity."""
+        field_names = ",".join(sorted(f['name'] for f in fields))
+        return hashlib.sha256(f"{code}|{field_names}|{self.model}".encode('utf-8')).hexdigest()
+    
+    def _cached(self, key: str):
+        """A cached explanation, moved to the most recently used end; None on a miss."""
+        result = self.cache.pop(key, None)
+        if result is None:
+            return None
+        self.cache[key] = result
+        self.cache_dirty = True
+        return tuple(result)
+    
+    def _remember(self, key: str, result: tuple):
+        """Cache a parsed explanation (unparseable replies are retried next run)."""
+        if result[0] != UNPARSED_RESPONSE:
+            self.cache[key] = list(result)
+            self.cache_dirty = True
+    
+    def _load_cache(self) -> dict:
+        """Load explanations saved by earlier runs."""
+        try:
+            with open(CACHE_FILE, 'rb') as f:
+                raw = f.read()
+            return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_cache(self):
+        """Persist the explanation cache; written to a temp file first so readers never see half of it."""
+        try:
+            CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = CACHE_FILE.with_name(f"{CACHE_FILE.name}.{os.getpid()}.tmp")
+            if len(self.cache) > MAX_CACHE_ENTRIES:
+                # Oldest first - drop the least recently used
+                self.cache = dict(list(self.cache.items())[-MAX_CACHE_ENTRIES:])
+            if HAS_ORJSON:
+                data = orjson.dumps(self.cache)
+            else:
+                data = json.dumps(self.cache).encode('utf-8')
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, CACHE_FILE)
+        except OSError as e:
+            print(f"  Warning: Could not save analysis cache: {e}")
+    
+    def _entity_request_params(self, name: str, code: str, fields: list, system: list) -> dict:
+        """Build the messages.create parameters for explaining one entity."""
         
         field_names = [f['name'] for f in fields]
         
-        prompt = f"""You are analyzing a codebase for a business analyst who is not technical.
-
-Here are all the entities in this system:
-{context}
-
-Now explain this specific entity:
+        if len(code) > MAX_PROMPT_CODE_CHARS:
+            code = code[:MAX_PROMPT_CODE_CHARS] + "\n[... truncated for brevity ...]"
+        
+        prompt = f"""Explain the entity "{name}":
 
 ```
 {code}
 ```
 
-Provide:
-1. A one-sentence plain English description of what "{name}" represents in business terms (not technical terms)
-2. For each field, a brief plain English explanation of what it means
-
-Respond in this exact JSON format:
-{{
-  "description": "One sentence explaining what this entity represents",
-  "fields": {{
-    "fieldName1": "What this field means",
-    "fieldName2": "What this field means"
-  }}
-}}
-
 Only include fields from this list: {field_names}
-Keep explanations simple and business-focused, not technical.
 """
         
-        response = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        return {
+            'model': self.model,
+            'max_tokens': max(MIN_OUTPUT_TOKENS, 200 + OUTPUT_TOKENS_PER_FIELD * len(fields)),
+            'system': system,
+            'tools': [ENTITY_TOOL],
+            'tool_choice': {"type": "tool", "name": ENTITY_TOOL['name']},
+            'messages': [{"role": "user", "content": prompt}],
+        }
+    
+    def _parse_entity_response(self, response) -> tuple:
+        """Extract (description, field_meanings) from a Claude message.
+        
+        A reply cut off at max_tokens has empty or missing fields, so it raises
+        instead - it is reported as a failure and never cached.
+        """
         
-        # Parse response
-        response_text = response.content[0].text
+        if getattr(response, 'stop_reason', None) == 'max_tokens':
+            raise RuntimeError("response truncated at max_tokens")
         
-        # Extract JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            data = json.loads(json_match.group())
-            return data.get('description', 'Unknown'), data.get('fields', {})
+        for block in response.content:
+            if block.type == 'tool_use':
+                data = block.input
+                return data.get('description', 'Unknown'), data.get('fields', {})
         
-        return "Could not parse AI response", {}
+        return UNPARSED_RESPONSE, {}
     
     def _basic_analyze_entities(self):
         """Fallback: Basic pattern-based analysis when AI is not available."""
-        patterns = {
-            'user': "Represents a person who can log into the system",
-            'customer': "Represents a customer who makes purchases",
-            'order': "Represents a purchase order",
-            'product': "Represents an item that can be purchased",
-            'cart': "Represents a shopping cart",
-            'payment': "Represents a payment transaction",
-            'address': "Represents a physical address",
-            'category': "Represents a grouping/category",
-            'review': "Represents a product review",
-            'session': "Represents a login session",
-            'discount': "Represents a discount or promotion",
-        }
-        
-        field_patterns = {
-            'id': 'Unique identifier',
-            'email': 'Email address',
-            'name': 'Name',
-            'price': 'Price/cost',
-            'quantity': 'Number of items',
-            'total': 'Total amount',
-            'status': 'Current status',
-            'createdat': 'When this was created',
-            'updatedat': 'When this was last modified',
-        }
-        
         for name, entity in self.entities.items():
             # Set description
-            name_lower = name.lower()
-            entity['description'] = next(
-                (desc for pattern, desc in patterns.items() if pattern in name_lower),
-                "Purpose unclear - needs review"
-            )
+            entity['description'] = _match_keyword(_ENTITY_KEYWORDS, name.lower(), UNCLEAR)
             
             # Set field meanings
             for field in entity['fields']:
-                field_lower = field['name'].lower()
-                field['meaning'] = next(
-                    (meaning for pattern, meaning in field_patterns.items() if pattern in field_lower),
-                    "Purpose unclear - needs review"
-                )
+                field['meaning'] = _match_keyword(_FIELD_KEYWORDS, field['name'].lower(), UNCLEAR)
     
     def _infer_relationships(self):
         """Infer relationships between entities."""
@@ -388,18 +830,20 @@ Keep explanations simple and business-focused, not technical.
             for field in entity['fields']:
                 field_lower = field['name'].lower()
                 
-                # Check for foreign key patterns
-                if field_lower.endswith('id') or field_lower.endswith('_id'):
-                    ref = field_lower.replace('_id', '').replace('id', '')
-                    
-                    # Find matching entity
-                    if ref in entity_names:
-                        self.relationships.append({
-                            'from': name,
-                            'to': entity_names[ref],
-                            'via': field['name'],
-                            'type': 'references',
-                        })
+                # Check for foreign key patterns (userId, user_id)
+                if not field_lower.endswith('id'):
+                    continue
+                ref = field_lower[:-3] if field_lower.endswith('_id') else field_lower[:-2]
+                
+                # Find matching entity
+                target = entity_names.get(ref)
+                if target:
+                    self.relationships.append({
+                        'from': name,
+                        'to': target,
+                        'via': field['name'],
+                        'type': 'references',
+                    })
     
     def _build_result(self) -> dict:
         """Build the final result."""
@@ -413,117 +857,134 @@ Keep explanations simple and business-focused, not technical.
         }
 
 
-def generate_report(result: dict) -> str:
-    """Generate a markdown report."""
-    lines = [
-        "# Business Dictionary",
-        "",
-        f"**Codebase:** {result['path']}",
-        f"**Generated:** {result['analyzed_at']}",
-        f"**AI-Powered:** {'Yes ' if result['ai_enabled'] else 'No (basic mode)'}",
-        "",
-        "---",
-        "",
-        "## Summary",
-        "",
-        f"Found **{result['entity_count']}** business entities.",
-        "",
-    ]
+def write_report(result: dict, out):
+    """Write the markdown report to `out` as it is built."""
+    write = out.write
+    
+    write(
+        "# Business Dictionary\n"
+        "\n"
+        f"**Codebase:** {result['path']}\n"
+        f"**Generated:** {result['analyzed_at']}\n"
+        f"**AI-Powered:** {'Yes ' if result['ai_enabled'] else 'No (basic mode)'}\n"
+        "\n"
+        "---\n"
+        "\n"
+        "## Summary\n"
+        "\n"
+        f"Found **{result['entity_count']}** business entities.\n"
+        "\n"
+    )
     
     if result['entities']:
-        lines.extend(["---", "", "## Business Entities", ""])
+        write("---\n\n## Business Entities\n\n")
         
         for name, entity in sorted(result['entities'].items()):
-            lines.append(f"### {name}")
-            lines.append("")
-            lines.append(f"**What it is:** {entity['description']}")
-            lines.append("")
-            lines.append(f"**File:** `{entity['file']}`")
-            lines.append("")
+            write(
+                f"### {name}\n"
+                f"\n"
+                f"**What it is:** {entity['description']}\n"
+                f"\n"
+                f"**File:** `{entity['file']}`\n"
+                f"\n"
+            )
             
             if entity['fields']:
-                lines.append("| Field | Type | What It Means |")
-                lines.append("|-------|------|---------------|")
+                write("| Field | Type | What It Means |\n|-------|------|---------------|\n")
                 
                 for field in entity['fields'][:15]:
                     meaning = field.get('meaning', 'Unknown')
-                    lines.append(f"| {field['name']} | {field['type']} | {meaning} |")
+                    write(f"| {field['name']} | {field['type']} | {meaning} |\n")
                 
-                lines.append("")
+                write("\n")
     
     if result['relationships']:
-        lines.extend(["---", "", "## How Things Connect", ""])
-        lines.append("| From | Relationship | To | Via Field |")
-        lines.append("|------|--------------|-----|-----------|")
+        write(
+            "---\n"
+            "\n"
+            "## How Things Connect\n"
+            "\n"
+            "| From | Relationship | To | Via Field |\n"
+            "|------|--------------|-----|-----------|\n"
+        )
         
         for rel in result['relationships']:
-            lines.append(f"| {rel['from']} | {rel['type']} | {rel['to']} | {rel['via']} |")
+            write(f"| {rel['from']} | {rel['type']} | {rel['to']} | {rel['via']} |\n")
         
-        lines.append("")
-    
-    lines.extend([
-        "---", "",
-        "## Next Steps", "",
-        "1. Review the entity descriptions",
-        "2. Run the **Flow Tracer** to understand processes",
-        "3. Run the **Risk Spotter** to identify dangerous areas",
-        ""
-    ])
+        write("\n")
     
-    return "\n".join(lines)
+    write(
+        "---\n"
+        "\n"
+        "## Next Steps\n"
+        "\n"
+        "1. Review the entity descriptions\n"
+        "2. Run the **Flow Tracer** to understand processes\n"
+        "3. Run the **Risk Spotter** to identify dangerous areas\n"
+    )
+
+
+def generate_report(result: dict) -> str:
+    """Generate a markdown report."""
+    buffer = io.StringIO()
+    write_report(result, buffer)
+    return buffer.getvalue()
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("=" * 60)
-        print("AI-ENHANCED TRANSLATOR AGENT")
-        print("=" * 60)
-        print("")
-        print("Usage: python translator_ai.py /path/to/codebase [--output glossary.md]")
-        print("")
-        print("Setup:")
-        print("  1. Install anthropic: pip install anthropic")
-        print("  2. Set your API key: export ANTHROPIC_API_KEY='your-key'")
-        print("")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='AI-Enhanced Translator Agent',
+        epilog="Setup: pip install anthropic, then export ANTHROPIC_API_KEY='your-key'",
+    )
+    parser.add_argument('codebase_path', help='Path to codebase to analyze')
+    parser.add_argument('--output', '-o', help='Save the report to this file instead of printing it')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'Claude model to use (default: {DEFAULT_MODEL})')
+    parser.add_argument('--batch', action='store_true', help='Submit all entities as one Message Batch')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help=f'Max Claude requests in flight (default: {MAX_CONCURRENT_REQUESTS})')
+    parser.add_argument('--no-ai', action='store_true', help='Skip Claude and use basic pattern analysis')
+    
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    codebase_path = args.codebase_path
+    output_file = args.output
     
-    codebase_path = sys.argv[1]
-    output_file = None
-    
-    if '--output' in sys.argv:
-        idx = sys.argv.index('--output')
-        if idx + 1 < len(sys.argv):
-            output_file = sys.argv[idx + 1]
-    
-    # Check setup
-    if not HAS_ANTHROPIC:
-        print("[!]  anthropic library not installed")
-        print("   Run: pip install anthropic")
-        print("   Continuing with basic analysis...")
-        print("")
-    elif not API_KEY:
-        print("[!]  ANTHROPIC_API_KEY not set")
-        print("   Run: export ANTHROPIC_API_KEY='your-key'")
-        print("   Continuing with basic analysis...")
-        print("")
+    # Check setup (nothing to warn about when AI was switched off on purpose)
+    if not args.no_ai:
+        if not HAS_ANTHROPIC:
+            print("[!]  anthropic library not installed")
+            print("   Run: pip install anthropic")
+            print("   Continuing with basic analysis...")
+            print("")
+        elif not API_KEY:
+            print("[!]  ANTHROPIC_API_KEY not set")
+            print("   Run: export ANTHROPIC_API_KEY='your-key'")
+            print("   Continuing with basic analysis...")
+            print("")
     
     print(f" AI Translator analyzing: {codebase_path}")
     print("")
     
     try:
-        translator = AITranslator(codebase_path)
+        translator = AITranslator(
+            codebase_path,
+            batch=args.batch,
+            model=args.model,
+            concurrency=args.concurrency,
+            use_ai=not args.no_ai,
+        )
         result = translator.analyze()
-        report = generate_report(result)
         
         if output_file:
             with open(output_file, 'w') as f:
-                f.write(report)
+                write_report(result, f)
             print("")
             print(f"[OK] Report saved to: {output_file}")
             print(f"   Found {result['entity_count']} entities")
             print(f"   AI-powered: {result['ai_enabled']}")
         else:
-            print(report)
+            write_report(result, sys.stdout)
             
     except Exception as e:
         print(f"[X] Error: {e}")